@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Compatibility shim: the Freebox implementation lives in freebox."""
+
+from freebox import (Error, FreeboxError, Freebox, FreeboxInfo,
+                     MDNSListener)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Connect to the Freebox through the FreeOS API to retrieve performance
+counters and push them to a Prometheus pushgateway."""
+
+import os
+import sys
+import argparse
+
+from freebox import Freebox, FreeboxError
+
+APP_NAME = "fbxmetrics"
+APP_VERSION = "0.1.0"
+
+PUSHGATEWAY_ADDRESS = "localhost"
+PUSHGATEWAY_PORT = 9091
+METRICS_PREFIXE = "fbx_"
+
+MDNS_TIMEOUT = 1.0
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(
+        prog=APP_NAME,
+        description="Retrieve performance counters from the Freebox "
+                    "and push them to a Prometheus pushgateway.")
+    parser.add_argument(
+        "-V", "--version", action="version",
+        version=f"{APP_NAME} {APP_VERSION}")
+    parser.add_argument(
+        "-r", "--register", action="store_true",
+        help="register the application on the Freebox and exit")
+    parser.add_argument(
+        "--mdns-timeout", type=float, default=MDNS_TIMEOUT, metavar="SECONDS",
+        help="maximum time to wait for the Freebox mDNS answer "
+             "(default: %(default)ss)")
+    parser.add_argument(
+        "--show-config", action="store_true",
+        help="print the effective configuration and exit")
+    args = parser.parse_args()
+
+    # Paths that need no network must return before discovery runs.
+    if args.show_config:
+        print(f"pushgateway: {PUSHGATEWAY_ADDRESS}:{PUSHGATEWAY_PORT}")
+        print(f"metrics prefix: {METRICS_PREFIXE}")
+        print(f"mdns timeout: {args.mdns_timeout}s")
+        return
+
+    try:
+        freebox = Freebox(discovery_timeout=args.mdns_timeout)
+    except FreeboxError as err:
+        print(err, file=sys.stderr)
+        sys.exit(1)
+
+    if args.register:
+        try:
+            freebox.register(APP_NAME, APP_VERSION)
+        except FreeboxError as err:
+            print(err, file=sys.stderr)
+            sys.exit(1)
+        print("Application registered on the Freebox.")
+        return
+
+    try:
+        metrics = freebox.get_metrics()
+        freebox.push_metrics(
+            metrics, f"{PUSHGATEWAY_ADDRESS}:{PUSHGATEWAY_PORT}",
+            METRICS_PREFIXE)
+    except FreeboxError as err:
+        print(err, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if os.getenv("PYTHON_DEBUG") == "true":
+        import ptvsd
+        ptvsd.enable_attach()
+        ptvsd.wait_for_attach()
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Freebox discovery over mDNS and FreeOS API access."""
+
+import os
+import sys
+import socket
+import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+# Computed once at import: platform.node() and realpath both cost
+# syscalls and neither changes while the process runs.
+_DEVICE_NAME = platform.node()
+_SSL_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(sys.argv[0])), "ssl")
+_CERTIFICATE = os.path.join(_SSL_DIR, "freebox_root_ca.pem")
+
+# Connect and read timeouts: a silent Freebox must not hang the
+# scrape scheduler.
+_TIMEOUT = (2, 5)
+
+# Discovery results are cached here: the Freebox address rarely
+# changes, so a cache hit replaces the mDNS round trip with a json
+# load and a cheap TCP probe.
+_CACHE_FILE = os.path.expanduser("~/.cache/fbxmetrics/discovery.json")
+
+# FreeOS endpoints polled for performance counters on each scrape.
+_METRICS_ENDPOINTS = (
+    "/connection/",
+    "/system/",
+    "/switch/status/",
+)
+
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+
+    __slots__ = ()
+
+
+class FreeboxError(Error):
+    """Exception raised when talking to the Freebox fails."""
+
+    __slots__ = ()
+
+
+class FreeboxInfo(NamedTuple):
+    """Service information advertised by the Freebox over mDNS."""
+
+    name: str
+    address: str
+    port: int
+    api_version: str = ""
+    api_version_major: int = 0
+    device_type: str = ""
+    api_base_url: str = ""
+    uid: str = ""
+    api_domain: str = ""
+    https_available: str = ""
+    https_port: str = ""
+    box_model: str = ""
+    box_model_name: str = ""
+
+
+class MDNSListener:
+    """Collect the Freebox service information published over mDNS."""
+
+    __slots__ = ("collected", "_found")
+
+    def __init__(self, found):
+        self.collected = {}
+        self._found = found
+
+    def add_service(self, zeroconf, type, name):
+        # Skip unrelated services before querying their records: the
+        # browser thread sees every service added on the LAN.
+        if type != Freebox._TYPE:
+            return
+        info = zeroconf.get_service_info(type, name)
+        if info is None:
+            return
+        props = self.collected
+        props["name"] = info.name
+        props["address"] = socket.inet_ntoa(bytes(info.address))
+        props["port"] = info.port
+        # TXT keys are ASCII per the mDNS spec; values may be empty.
+        props.update(
+            (key.decode("ascii"), value.decode("utf-8") if value else "")
+            for key, value in info.properties.items())
+        self._found.set()
+
+    def update_service(self, zeroconf, type, name):
+        pass
+
+    def remove_service(self, zeroconf, type, name):
+        pass
+
+
+class Freebox:
+    """A Freebox discovered on the local network."""
+
+    _TYPE = "_fbx-api._tcp.local."
+
+    __slots__ = ("_info", "_discovery_timeout", "_session",
+                 "_found", "_api_prefix")
+
+    def __init__(self, discovery_timeout=1.0):
+        # Imported here so loading the module (for --help or --version)
+        # does not pay for requests and urllib3.
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self._discovery_timeout = discovery_timeout
+        # One session for every API call: keep-alive connections avoid
+        # paying a new TCP + TLS handshake per request.
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=2, pool_maxsize=8,
+            max_retries=Retry(total=2, backoff_factor=0.2,
+                              status_forcelist=[502, 503, 504])))
+        self._info = self._load_cached_info()
+        if self._info is None:
+            self._info = self._discover()
+            self._save_cached_info()
+        # None of the URL components change after discovery: build the
+        # API prefix once instead of on every call.
+        self._api_prefix = (
+            f"https://{self._info.api_domain}"
+            f"{self._info.api_base_url}v{self._info.api_version_major}")
+
+    def _discover(self):
+        """Run mDNS discovery and return the Freebox information."""
+        from zeroconf import Zeroconf, ServiceBrowser
+
+        self._found = threading.Event()
+        listener = MDNSListener(self._found)
+        zeroconf = Zeroconf()
+        ServiceBrowser(zeroconf, self._TYPE, listener)
+        self._found.wait(timeout=self._discovery_timeout)
+        zeroconf.close()
+        collected = listener.collected
+        if not collected:
+            raise FreeboxError("Freebox not found on the local network.")
+        major, _, _ = collected["api_version"].partition(".")
+        collected["api_version_major"] = int(major)
+        # Frozen, typed view of the discovery results: attribute access
+        # beats a dict lookup on every URL build.
+        return FreeboxInfo(**{
+            key: value for key, value in collected.items()
+            if key in FreeboxInfo._fields})
+
+    def _load_cached_info(self):
+        """Return the cached discovery results, or None.
+
+        A stale, corrupt or missing cache falls back to mDNS; a cached
+        Freebox that no longer answers a 200ms TCP probe does too.
+        """
+        import json
+
+        try:
+            with open(_CACHE_FILE) as cache:
+                info = FreeboxInfo(**json.load(cache))
+        except (OSError, ValueError, TypeError):
+            return None
+        try:
+            port = int(info.https_port or 443)
+            with socket.create_connection((info.api_domain, port),
+                                          timeout=0.2):
+                pass
+        except (OSError, ValueError):
+            return None
+        return info
+
+    def _save_cached_info(self):
+        """Cache the discovery results for the next run."""
+        import json
+
+        try:
+            os.makedirs(os.path.dirname(_CACHE_FILE), exist_ok=True)
+            with open(_CACHE_FILE, "w") as cache:
+                json.dump(self._info._asdict(), cache)
+        except OSError:
+            pass
+
+    @property
+    def info(self):
+        return self._info
+
+    def _full_api_url(self, api_url):
+        return f"{self._api_prefix}{api_url}"
+
+    def register(self, app_name, app_version):
+        """Request an application token from the Freebox."""
+        import requests
+
+        data = {
+            "app_id": f"fr.freebox.{app_name.lower()}",
+            "app_name": app_name,
+            "app_version": app_version,
+            "device_name": _DEVICE_NAME
+        }
+        url = self._full_api_url("/login/authorize/")
+        try:
+            r = self._session.post(url, json=data, verify=_CERTIFICATE,
+                                   timeout=_TIMEOUT)
+        except (requests.Timeout, requests.ConnectionError) as err:
+            raise FreeboxError(f"Registration request failed: {err}")
+        if r.status_code != 200:
+            raise FreeboxError(
+                f"Registration request failed: {r.status_code}")
+        answer = r.json()
+        if not answer["success"]:
+            raise FreeboxError(
+                f"Registration refused by the Freebox: {answer['msg']}")
+        return answer["result"]["app_token"], answer["result"]["track_id"]
+
+    def get_metrics(self):
+        """Retrieve the performance counters from the Freebox.
+
+        The endpoints are fetched concurrently on the pooled session,
+        so a scrape costs roughly one round trip instead of one per
+        endpoint.
+        """
+        import requests
+
+        def fetch(endpoint):
+            try:
+                r = self._session.get(self._full_api_url(endpoint),
+                                      verify=_CERTIFICATE, timeout=_TIMEOUT)
+            except (requests.Timeout, requests.ConnectionError) as err:
+                raise FreeboxError(
+                    f"Metrics request failed on {endpoint}: {err}")
+            if r.status_code != 200:
+                raise FreeboxError(
+                    f"Metrics request failed on {endpoint}: {r.status_code}")
+            answer = r.json()
+            if not answer["success"]:
+                raise FreeboxError(
+                    f"Metrics request refused on {endpoint}: "
+                    f"{answer['msg']}")
+            return answer["result"]
+
+        with ThreadPoolExecutor(
+                max_workers=len(_METRICS_ENDPOINTS)) as executor:
+            results = executor.map(fetch, _METRICS_ENDPOINTS)
+        return dict(zip(_METRICS_ENDPOINTS, results))
+
+    def push_metrics(self, metrics, gateway, prefix):
+        """Push the retrieved counters to the pushgateway.
+
+        All counters are batched into a single registry and pushed as
+        one request per scrape cycle; the pushgateway does not cope
+        with one request per metric.
+        """
+        import requests
+        from prometheus_client import (CollectorRegistry, Gauge,
+                                       push_to_gateway)
+
+        registry = CollectorRegistry()
+        for endpoint, result in metrics.items():
+            group = endpoint.strip("/").replace("/", "_")
+            for key, value in result.items():
+                if isinstance(value, bool) or not isinstance(
+                        value, (int, float)):
+                    continue
+                gauge = Gauge(f"{prefix}{group}_{key}",
+                              f"{key} from {endpoint}", registry=registry)
+                gauge.set(value)
+
+        def handler(url, method, timeout, headers, data):
+            # Route the push through the pooled session instead of the
+            # default urllib handler.
+            def handle():
+                try:
+                    r = self._session.request(method, url, data=data,
+                                              headers=dict(headers),
+                                              timeout=timeout)
+                except (requests.Timeout, requests.ConnectionError) as err:
+                    raise FreeboxError(
+                        f"Pushgateway unreachable: {err}")
+                if r.status_code >= 400:
+                    raise FreeboxError(
+                        f"Pushgateway refused the metrics: {r.status_code}")
+            return handle
+
+        push_to_gateway(
+            gateway, job="freeprobe", registry=registry,
+            grouping_key={"instance": self._info.uid},
+            handler=handler)
+
+    def close(self):
+        """Release the pooled HTTP connections."""
+        self._session.close()
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Probe the local network for a Freebox and print what it advertises."""
+
+import os
+import sys
+
+from freebox import Freebox, FreeboxError
+
+
+def main():
+    """Command line entry point."""
+    try:
+        freebox = Freebox()
+    except FreeboxError as err:
+        print(err, file=sys.stderr)
+        sys.exit(1)
+    for key, value in freebox.info._asdict().items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    if os.getenv("PYTHON_DEBUG") == "true":
+        import ptvsd
+        ptvsd.enable_attach()
+        ptvsd.wait_for_attach()
+    main()